@@ -0,0 +1,88 @@
+"""Сравнение памяти и времени построения метаданных таблиц.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_schema_catalog --tables 50000 --columns 100
+
+Базы данных не требуется: строки каталога генерируются синтетически.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from db.database import ColumnType, TableField, TableSchema
+from db.schema_catalog import SchemaCatalog
+
+PG_TYPES = ['integer', 'double precision', 'character varying', 'date', 'timestamp', 'numeric', 'text', 'boolean']
+
+
+def generate_rows(tables, columns):
+    for t in range(tables):
+        table_name = f"table_{t}"
+        for c in range(columns):
+            yield table_name, f"column_{c}", PG_TYPES[c % len(PG_TYPES)], c % 3 != 0, c == 0
+
+
+def build_tuples(rows):
+    result = {}
+    for table_name, column_name, pg_type, is_nullable, is_primary in rows:
+        result.setdefault(table_name, []).append(
+            (column_name, ColumnType.from_postgres_type(pg_type), is_nullable, is_primary)
+        )
+    return result
+
+
+def build_pydantic(rows):
+    fields = {}
+    for table_name, column_name, pg_type, is_nullable, is_primary in rows:
+        fields.setdefault(table_name, {})[column_name] = TableField(
+            name=column_name,
+            type=ColumnType.from_postgres_type(pg_type),
+            is_nullable=is_nullable,
+            is_primary=is_primary
+        )
+    return {name: TableSchema(name=name, fields=table_fields) for name, table_fields in fields.items()}
+
+
+def build_catalog(rows):
+    catalog = SchemaCatalog()
+    catalog.extend(rows)
+    return catalog
+
+
+def measure(builder, tables, columns):
+    """Время построения без tracemalloc, память - по отдельному прогону под tracemalloc"""
+    gc.collect()
+    started = time.perf_counter()
+    result = builder(generate_rows(tables, columns))
+    elapsed = time.perf_counter() - started
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = builder(generate_rows(tables, columns))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--skip-pydantic", action="store_true", help="не строить TableSchema (долго на больших объемах)")
+    args = parser.parse_args()
+
+    builders = [("tuples + ColumnType", build_tuples), ("SchemaCatalog", build_catalog)]
+    if not args.skip_pydantic:
+        builders.insert(1, ("TableSchema/TableField", build_pydantic))
+
+    print(f"{args.tables} tables x {args.columns} columns")
+    print(f"{'model':<24}{'build, s':>10}{'retained, MiB':>16}{'peak, MiB':>12}")
+    for label, builder in builders:
+        elapsed, current, peak = measure(builder, args.tables, args.columns)
+        print(f"{label:<24}{elapsed:>10.2f}{current / 2 ** 20:>16.1f}{peak / 2 ** 20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
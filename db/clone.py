@@ -0,0 +1,324 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+import psycopg2
+from psycopg2 import sql
+from pydantic import BaseModel
+from typing import Optional
+from db.database import Database, DatabaseConfig
+
+
+class CloneReport(BaseModel):
+    table_name: str
+    streams: int
+    rows: int
+    bytes: int
+    load_time: float
+    total_time: float
+    constraints_error: Optional[str] = None
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.load_time if self.load_time else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        return self.bytes / 2 ** 20 / self.load_time if self.load_time else 0.0
+
+
+class _Progress:
+    def __init__(self, callback, interval):
+        self.callback = callback
+        self.interval = interval
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self._reported = self.started
+        self._lock = threading.Lock()
+
+    def add(self, size):
+        with self._lock:
+            self.bytes += size
+            now = time.perf_counter()
+            if self.callback and now - self._reported >= self.interval:
+                self._reported = now
+                self.callback(self.bytes, now - self.started)
+
+
+class _CountingReader:
+    """Файловый объект для COPY FROM, считающий прочитанные байты"""
+
+    def __init__(self, file, progress):
+        self.file = file
+        self.progress = progress
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.progress.add(len(data))
+        return data
+
+    def readline(self, size=-1):
+        data = self.file.readline(size)
+        self.progress.add(len(data))
+        return data
+
+
+def _page_ranges(pages, streams, min_pages_per_stream):
+    """Делит таблицу на диапазоны страниц для ctid; последний диапазон открыт сверху"""
+    count = max(1, min(streams, pages // max(min_pages_per_stream, 1)))
+    step = pages // count
+    return [(i * step, (i + 1) * step if i < count - 1 else None) for i in range(count)]
+
+
+def _copy_to_query(table_name, column_names, start_page, end_page):
+    """COPY TO по явному списку столбцов.
+
+    Всегда через SELECT: COPY таблицы пропускает генерируемые столбцы, а
+    приемник создается с ними как с обычными столбцами.
+    """
+    select = sql.SQL("SELECT {} FROM {}").format(
+        sql.SQL(", ").join(map(sql.Identifier, column_names)),
+        sql.Identifier(table_name)
+    )
+    if start_page == 0 and end_page is None:
+        return sql.SQL("COPY ({}) TO STDOUT").format(select)
+    condition = sql.SQL("ctid >= {}::tid").format(sql.Literal(f"({start_page},0)"))
+    if end_page is not None:
+        condition = sql.SQL("{} AND ctid < {}::tid").format(condition, sql.Literal(f"({end_page},0)"))
+    return sql.SQL("COPY ({} WHERE {}) TO STDOUT").format(select, condition)
+
+
+def _copy_from_query(table_name, column_names):
+    return sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(map(sql.Identifier, column_names))
+    )
+
+
+def _pipe_stream(source_connection, snapshot, target_connection, table_name, column_names, page_range, progress):
+    """Передает диапазон строк из COPY TO источника в COPY FROM приемника через pipe.
+
+    Транзакция приемника не фиксируется - это делает clone_table после
+    успешного завершения всех потоков.
+    """
+    source_connection.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    source_cursor = source_connection.cursor()
+    source_cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    def write_source():
+        try:
+            with os.fdopen(write_fd, "wb") as pipe:
+                source_cursor.copy_expert(_copy_to_query(table_name, column_names, *page_range), pipe)
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write_source, daemon=True)
+    writer.start()
+    target_cursor = target_connection.cursor()
+    try:
+        with os.fdopen(read_fd, "rb") as pipe:
+            target_cursor.copy_expert(_copy_from_query(table_name, column_names), _CountingReader(pipe, progress))
+    finally:
+        writer.join()
+    if errors:
+        raise errors[0]
+    return target_cursor.rowcount
+
+
+def _fetch_source_layout(source, table_name):
+    """Возвращает столбцы таблицы, число страниц и определения индексов, кроме первичного ключа.
+
+    Столбцы - кортежи (имя, точный тип из format_type, NOT NULL, позиция в первичном ключе или None).
+    """
+    source.reopen_cursor()
+    source.cursor.execute(
+        """
+        SELECT
+            a.attname,
+            format_type(a.atttypid, a.atttypmod),
+            a.attnotnull,
+            array_position(pk.indkey::int2[], a.attnum)
+        FROM pg_attribute a
+        LEFT JOIN pg_index pk ON pk.indrelid = a.attrelid AND pk.indisprimary
+        WHERE a.attrelid = quote_ident(%s)::regclass AND a.attnum > 0 AND NOT a.attisdropped
+        ORDER BY a.attnum
+        """,
+        (table_name,)
+    )
+    columns = source.cursor.fetchall()
+    source.cursor.execute(
+        "SELECT pg_relation_size(quote_ident(%s)::regclass) / current_setting('block_size')::int",
+        (table_name,)
+    )
+    pages = source.cursor.fetchone()[0]
+    source.cursor.execute(
+        """
+        SELECT pg_get_indexdef(indexrelid)
+        FROM pg_index
+        WHERE indrelid = quote_ident(%s)::regclass AND NOT indisprimary
+        """,
+        (table_name,)
+    )
+    index_definitions = [row[0] for row in source.cursor.fetchall()]
+    source.connection.commit()
+    return columns, pages, index_definitions
+
+
+def _create_bare_table(target, table_name, columns):
+    """Создает таблицу с точными типами столбцов, без ограничений и индексов"""
+    target.execute_query(sql.SQL("CREATE TABLE {} ({})").format(
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(
+            sql.SQL("{} {}").format(sql.Identifier(name), sql.SQL(column_type))
+            for name, column_type, _, _ in columns
+        )
+    ))
+
+
+def _build_constraints(target, table_name, columns, index_definitions):
+    """Создает NOT NULL, первичный ключ и индексы после загрузки данных"""
+    table = sql.Identifier(table_name)
+    not_null = [sql.SQL("ALTER COLUMN {} SET NOT NULL").format(sql.Identifier(name))
+                for name, _, is_not_null, _ in columns if is_not_null]
+    if not_null:
+        target.execute_query(sql.SQL("ALTER TABLE {} {}").format(table, sql.SQL(", ").join(not_null)))
+
+    # Порядок столбцов составного ключа - как в индексе первичного ключа источника
+    primary_keys = sorted((pk_position, name) for name, _, _, pk_position in columns if pk_position is not None)
+    primary_keys = [sql.Identifier(name) for _, name in primary_keys]
+    if primary_keys:
+        target.execute_query(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY ({})").format(
+            table, sql.SQL(", ").join(primary_keys)
+        ))
+
+    for index_definition in index_definitions:
+        target.execute_query(index_definition)
+
+
+def clone_table(source: Database, target: Database, table_name, streams=4, min_pages_per_stream=1000,
+                progress=None, progress_interval=1.0):
+    """Копирует структуру и данные таблицы из source в target.
+
+    Таблица создается с точными типами столбцов источника (format_type), но
+    без ограничений, индексов и значений по умолчанию; данные передаются
+    параллельными потоками COPY по диапазонам ctid из общего снимка
+    источника, затем строятся NOT NULL, первичный ключ и индексы.
+    progress(bytes, elapsed) вызывается не чаще раза в progress_interval секунд.
+    """
+    started = time.perf_counter()
+    if table_name not in source.get_tables():
+        raise ValueError(f"Table {table_name} not found in source database")
+    if table_name in target.get_tables():
+        raise ValueError(f"Table {table_name} already exists in target database")
+
+    columns, pages, index_definitions = _fetch_source_layout(source, table_name)
+    page_ranges = _page_ranges(pages, streams, min_pages_per_stream)
+
+    _create_bare_table(target, table_name, columns)
+
+    column_names = [name for name, _, _, _ in columns]
+    snapshot_connection = None
+    source_connections = []
+    target_connections = []
+    try:
+        # Снимок источника, общий для всех потоков, держится до конца загрузки
+        snapshot_connection = psycopg2.connect(**source.config)
+        snapshot_connection.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        snapshot_cursor = snapshot_connection.cursor()
+        snapshot_cursor.execute("SELECT pg_export_snapshot()")
+        snapshot = snapshot_cursor.fetchone()[0]
+
+        for _ in page_ranges:
+            source_connections.append(psycopg2.connect(**source.config))
+            target_connections.append(psycopg2.connect(**target.config))
+        load_progress = _Progress(progress, progress_interval)
+        with ThreadPoolExecutor(max_workers=len(page_ranges)) as executor:
+            futures = [
+                executor.submit(_pipe_stream, source_connection, snapshot, target_connection, table_name,
+                                column_names, page_range, load_progress)
+                for source_connection, target_connection, page_range
+                in zip(source_connections, target_connections, page_ranges)
+            ]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            failed = [future.exception() for future in done if future.exception()]
+            if failed:
+                # Прерываем COPY остальных потоков, чтобы не ждать окончания их загрузки
+                for connection in source_connections + target_connections:
+                    connection.cancel()
+                raise failed[0]
+            rows = sum(future.result() for future in futures)
+        for connection in target_connections:
+            connection.commit()
+        load_time = time.perf_counter() - load_progress.started
+    except Exception as e:
+        logging.error(f"Error cloning table {table_name}: {e}")
+        for connection in target_connections:
+            connection.rollback()
+        target.delete_table(table_name)
+        raise
+    finally:
+        for connection in source_connections + target_connections:
+            connection.close()
+        if snapshot_connection:
+            snapshot_connection.close()
+
+    constraints_error = None
+    try:
+        _build_constraints(target, table_name, columns, index_definitions)
+        target.execute_query(sql.SQL("ANALYZE {}").format(sql.Identifier(table_name)))
+    except Exception as e:
+        # Данные уже загружены и зафиксированы - таблицу не удаляем, а сообщаем об ошибке
+        constraints_error = str(e)
+        logging.error(f"Table {table_name} loaded, but constraints or indexes were not created: {e}")
+
+    report = CloneReport(
+        table_name=table_name,
+        streams=len(page_ranges),
+        rows=rows,
+        bytes=load_progress.bytes,
+        load_time=load_time,
+        total_time=time.perf_counter() - started,
+        constraints_error=constraints_error
+    )
+    logging.info(
+        f"Table {table_name} cloned: {report.rows} rows, {report.bytes / 2 ** 20:.1f} MiB "
+        f"in {report.streams} streams, {report.rows_per_second:.0f} rows/s, "
+        f"{report.megabytes_per_second:.1f} MiB/s, total {report.total_time:.1f} s"
+    )
+    return report
+
+
+def _load_config(file_path):
+    with open(file_path, "r") as file:
+        return DatabaseConfig(**json.load(file))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Копирование таблицы между базами данных")
+    parser.add_argument("source_config", help="файл настроек подключения к источнику")
+    parser.add_argument("target_config", help="файл настроек подключения к приемнику")
+    parser.add_argument("table_name")
+    parser.add_argument("--streams", type=int, default=4)
+    args = parser.parse_args()
+
+    source_db = Database(_load_config(args.source_config))
+    target_db = Database(_load_config(args.target_config))
+    try:
+        result = clone_table(
+            source_db, target_db, args.table_name, streams=args.streams,
+            progress=lambda copied, elapsed: print(f"{copied / 2 ** 20:.1f} MiB, "
+                                                   f"{copied / 2 ** 20 / elapsed:.1f} MiB/s")
+        )
+        print(f"{result.rows} rows in {result.total_time:.1f} s "
+              f"({result.rows_per_second:.0f} rows/s, {result.megabytes_per_second:.1f} MiB/s)")
+        if result.constraints_error:
+            print(f"Constraints or indexes were not created: {result.constraints_error}")
+    finally:
+        source_db.close()
+        target_db.close()
@@ -1,6 +1,8 @@
 import psycopg2
+import psycopg2.errors
 from psycopg2 import sql
 import logging
+import time
 from pydantic import BaseModel, Field, validator
 from typing import Dict
 from enum import Enum
@@ -36,6 +38,36 @@ class ColumnType(str, Enum):
         return type_mapping.get(pg_type.lower(), cls.TEXT)
 
 
+# Запросы, которые подготавливаются на сервере один раз на соединение (PREPARE)
+# и затем выполняются через EXECUTE без повторного разбора и планирования
+PREPARED_STATEMENTS = {
+    "sa_get_tables": """
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema='public'
+        ORDER BY table_name
+    """,
+    "sa_get_table_fields": """
+        SELECT
+            c.column_name,
+            c.data_type,
+            c.is_nullable,
+            CASE WHEN pk.constraint_name IS NOT NULL THEN true ELSE false END as is_primary
+        FROM information_schema.columns c
+        LEFT JOIN (
+            SELECT ku.column_name, tc.constraint_name
+            FROM information_schema.table_constraints tc
+            JOIN information_schema.key_column_usage ku
+                ON tc.constraint_name = ku.constraint_name
+            WHERE tc.constraint_type = 'PRIMARY KEY'
+                AND tc.table_name = $1
+        ) pk ON c.column_name = pk.column_name
+        WHERE c.table_name = $1
+        ORDER BY c.ordinal_position
+    """,
+}
+
+
 class DatabaseConfig(BaseModel):
     host: str
     port: int
@@ -76,12 +108,28 @@ class Database:
         self.config = config.dict()
         self.connection = None
         self.cursor = None
+        # Имя подготовленного выражения -> оценка стоимости его разбора на сервере
+        self.prepared = {}
+        self.round_trip = None
+        # prepared - число PREPARE, каждый из них - дополнительный сетевой обмен при первом вызове;
+        # parse_time_saved - время PREPARE за вычетом сетевого обмена (SELECT 1), суммированное
+        # по повторным EXECUTE. Планирование выполняется при EXECUTE и в оценку не входит
+        self.statement_stats = {
+            "prepared": 0,
+            "executed": 0,
+            "prepare_time": 0.0,
+            "round_trip": 0.0,
+            "parse_time_saved": 0.0,
+        }
         self.connect()
 
     def connect(self):
         try:
             self.connection = psycopg2.connect(**self.config)
             self.cursor = self.connection.cursor()
+            # Подготовленные выражения живут только в рамках сессии
+            self.prepared.clear()
+            self.round_trip = None
             logging.info("Connected to the database")
         except Exception as e:
             logging.error(f"Error connecting to the database: {e}")
@@ -89,6 +137,7 @@ class Database:
 
     def close(self):
         try:
+            logging.info(f"Prepared statement stats: {self.statement_stats}")
             if self.cursor:
                 self.cursor.close()
             if self.connection:
@@ -99,14 +148,70 @@ class Database:
             raise
 
     def reopen_cursor(self):
+        # Курсор переиспользуется, новый создается только если старый закрыт
         try:
-            if self.cursor and not self.cursor.closed:
-                self.cursor.close()
-            self.cursor = self.connection.cursor()
+            if self.cursor is None or self.cursor.closed:
+                self.cursor = self.connection.cursor()
         except Exception as e:
             logging.error(f"Error reopening cursor: {e}")
             raise
 
+    def measure_round_trip(self):
+        """Время сетевого обмена с сервером, измеряется один раз на соединение"""
+        if self.round_trip is None:
+            started = time.perf_counter()
+            self.cursor.execute("SELECT 1")
+            self.cursor.fetchall()
+            self.round_trip = time.perf_counter() - started
+            self.statement_stats["round_trip"] = self.round_trip
+        return self.round_trip
+
+    def prepare(self, name):
+        """Подготавливает запрос из PREPARED_STATEMENTS на сервере"""
+        round_trip = self.measure_round_trip()
+        started = time.perf_counter()
+        try:
+            self.cursor.execute(
+                sql.SQL("PREPARE {} AS {}").format(sql.Identifier(name), sql.SQL(PREPARED_STATEMENTS[name]))
+            )
+        except psycopg2.errors.DuplicatePreparedStatement:
+            # Выражение уже есть на сервере (например, после переподключения через пул) - используем его
+            self.connection.rollback()
+            self.prepared[name] = 0.0
+            return
+        elapsed = time.perf_counter() - started
+        self.statement_stats["prepare_time"] += elapsed
+        self.statement_stats["prepared"] += 1
+        self.prepared[name] = max(elapsed - round_trip, 0.0)
+
+    def execute_prepared(self, name, params=None, retry=True):
+        """Выполняет запрос из PREPARED_STATEMENTS, подготавливая его при первом вызове"""
+        self.reopen_cursor()
+        if name not in self.prepared:
+            self.prepare(name)
+        else:
+            self.statement_stats["parse_time_saved"] += self.prepared[name]
+
+        if params:
+            query = sql.SQL("EXECUTE {} ({})").format(
+                sql.Identifier(name),
+                sql.SQL(", ").join(sql.Placeholder() * len(params))
+            )
+        else:
+            query = sql.SQL("EXECUTE {}").format(sql.Identifier(name))
+
+        try:
+            self.cursor.execute(query, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Выражение было удалено на сервере (например, DEALLOCATE) - подготавливаем заново один раз
+            self.connection.rollback()
+            self.prepared.pop(name, None)
+            if not retry:
+                raise
+            return self.execute_prepared(name, params, retry=False)
+        self.statement_stats["executed"] += 1
+        return self.cursor.fetchall()
+
     def execute_query(self, query: str, params=None):
         self.reopen_cursor()
         try:
@@ -121,47 +226,21 @@ class Database:
             raise
 
     def get_tables(self):
-        self.reopen_cursor()
         try:
-            self.cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema='public'
-                ORDER BY table_name
-            """)
-            return [row[0] for row in self.cursor.fetchall()]
+            return [row[0] for row in self.execute_prepared("sa_get_tables")]
         except Exception as e:
             logging.error(f"Error fetching tables: {e}")
             raise
 
     def get_table_fields(self, table_name):
-        self.reopen_cursor()
         try:
-            query = sql.SQL("""
-                SELECT 
-                    c.column_name, 
-                    c.data_type, 
-                    c.is_nullable,
-                    CASE WHEN pk.constraint_name IS NOT NULL THEN true ELSE false END as is_primary
-                FROM information_schema.columns c
-                LEFT JOIN (
-                    SELECT ku.column_name, tc.constraint_name
-                    FROM information_schema.table_constraints tc
-                    JOIN information_schema.key_column_usage ku
-                        ON tc.constraint_name = ku.constraint_name
-                    WHERE tc.constraint_type = 'PRIMARY KEY'
-                        AND tc.table_name = %s
-                ) pk ON c.column_name = pk.column_name
-                WHERE c.table_name = %s
-                ORDER BY c.ordinal_position
-            """)
-            self.cursor.execute(query, (table_name, table_name))
+            rows = self.execute_prepared("sa_get_table_fields", (table_name,))
             return [
                 (row[0],  # name
                  ColumnType.from_postgres_type(row[1]),  # type
                  row[2] == 'YES',  # is_nullable
                  row[3])  # is_primary
-                for row in self.cursor.fetchall()
+                for row in rows
             ]
         except Exception as e:
             logging.error(f"Error fetching fields for table {table_name}: {e}")
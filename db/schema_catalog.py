@@ -0,0 +1,157 @@
+import sys
+from array import array
+from db.database import ColumnType, TableField, TableSchema
+
+# Коды типов - индексы в COLUMN_TYPES, хранятся в array('B') по одному байту на столбец
+COLUMN_TYPES = list(ColumnType)
+_TYPE_CODES = {column_type: code for code, column_type in enumerate(COLUMN_TYPES)}
+
+# Флаги столбца, упакованные в один байт
+FLAG_NULLABLE = 1
+FLAG_PRIMARY = 2
+
+CATALOG_QUERY = """
+    SELECT
+        c.table_name,
+        c.column_name,
+        c.data_type,
+        c.is_nullable,
+        pk.column_name IS NOT NULL as is_primary
+    FROM information_schema.columns c
+    LEFT JOIN (
+        SELECT ku.table_name, ku.column_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage ku
+            ON tc.constraint_name = ku.constraint_name
+            AND tc.table_schema = ku.table_schema
+        WHERE tc.constraint_type = 'PRIMARY KEY'
+            AND tc.table_schema = 'public'
+    ) pk ON c.table_name = pk.table_name AND c.column_name = pk.column_name
+    WHERE c.table_schema = 'public'
+    ORDER BY c.table_name, c.ordinal_position
+"""
+
+
+class SchemaCatalog:
+    """Компактное колоночное хранилище метаданных всех таблиц.
+
+    Имена интернируются и хранятся один раз, столбцы описываются тремя
+    массивами (id имени, код типа, флаги). Полноценные TableSchema/TableField
+    создаются только по запросу через to_table_schema.
+    """
+
+    def __init__(self):
+        self._names = []
+        self._name_ids = {}
+        self._pg_type_codes = {}
+        self._tables = {}
+        self._offsets = array('I', [0])
+        self._column_names = array('I')
+        self._column_types = array('B')
+        self._column_flags = array('B')
+
+    @classmethod
+    def from_database(cls, db, itersize=10000):
+        """Загружает метаданные всех таблиц схемы public одним потоковым запросом"""
+        catalog = cls()
+        with db.connection.cursor(name="sa_schema_catalog") as cursor:
+            cursor.itersize = itersize
+            cursor.execute(CATALOG_QUERY)
+            catalog.extend(
+                (table_name, column_name, pg_type, is_nullable == 'YES', is_primary)
+                for table_name, column_name, pg_type, is_nullable, is_primary in cursor
+            )
+        db.connection.commit()
+        return catalog
+
+    def extend(self, rows):
+        """Добавляет строки (таблица, столбец, тип postgres, nullable, primary), сгруппированные по таблицам"""
+        current_table = None
+        for table_name, column_name, pg_type, is_nullable, is_primary in rows:
+            if table_name != current_table:
+                self._start_table(table_name)
+                current_table = table_name
+            self._append_column(column_name, self._pg_type_code(pg_type), is_nullable, is_primary)
+
+    def add_table(self, table_name, columns):
+        """Добавляет таблицу; columns в формате Database.get_table_fields"""
+        self._start_table(table_name)
+        for column_name, column_type, is_nullable, is_primary in columns:
+            if isinstance(column_type, ColumnType):
+                code = _TYPE_CODES[column_type]
+            else:
+                code = self._pg_type_code(column_type)
+            self._append_column(column_name, code, is_nullable, is_primary)
+
+    def remove_table(self, table_name):
+        """Убирает таблицу из каталога, например после изменения ее структуры.
+
+        Столбцы остаются в массивах до создания нового каталога.
+        """
+        self._tables.pop(table_name, None)
+
+    def _intern(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(sys.intern(name))
+            self._name_ids[name] = name_id
+        return name_id
+
+    def _pg_type_code(self, pg_type):
+        code = self._pg_type_codes.get(pg_type)
+        if code is None:
+            code = _TYPE_CODES[ColumnType.from_postgres_type(pg_type)]
+            self._pg_type_codes[pg_type] = code
+        return code
+
+    def _start_table(self, table_name):
+        if table_name in self._tables:
+            raise ValueError(f"Table {table_name} already in catalog")
+        self._tables[self._names[self._intern(table_name)]] = len(self._offsets) - 1
+        self._offsets.append(self._offsets[-1])
+
+    def _append_column(self, column_name, type_code, is_nullable, is_primary):
+        self._column_names.append(self._intern(column_name))
+        self._column_types.append(type_code)
+        self._column_flags.append((FLAG_NULLABLE if is_nullable else 0) | (FLAG_PRIMARY if is_primary else 0))
+        self._offsets[-1] += 1
+
+    def _column_range(self, table_name):
+        try:
+            index = self._tables[table_name]
+        except KeyError:
+            raise KeyError(f"Table {table_name} not in catalog") from None
+        return range(self._offsets[index], self._offsets[index + 1])
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __contains__(self, table_name):
+        return table_name in self._tables
+
+    @property
+    def column_count(self):
+        return len(self._column_names)
+
+    def get_tables(self):
+        return sorted(self._tables)
+
+    def get_table_fields(self, table_name):
+        """Столбцы таблицы в том же формате, что и Database.get_table_fields"""
+        names, types, flags = self._names, self._column_types, self._column_flags
+        return [
+            (names[self._column_names[i]],
+             COLUMN_TYPES[types[i]],
+             bool(flags[i] & FLAG_NULLABLE),
+             bool(flags[i] & FLAG_PRIMARY))
+            for i in self._column_range(table_name)
+        ]
+
+    def to_table_schema(self, table_name):
+        """Создает полноценную TableSchema для редактирования таблицы"""
+        fields = {
+            name: TableField(name=name, type=column_type, is_nullable=is_nullable, is_primary=is_primary)
+            for name, column_type, is_nullable, is_primary in self.get_table_fields(table_name)
+        }
+        return TableSchema(name=table_name, fields=fields)
@@ -0,0 +1,151 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+
+class UIDiagnostics:
+    """Диагностика отзывчивости интерфейса TableEditorApp.
+
+    Heartbeat через after() измеряет задержку главного цикла и записывает
+    зависания дольше stall_threshold_ms. Пока главный цикл завис, фоновый
+    поток снимает стеки главного потока. Время каждого действия делится на
+    фазы db/model/widget; время в модальных диалогах (фаза dialog) в widget
+    не входит. Стеки сохраняются в формате folded (flamegraph.pl,
+    speedscope).
+    """
+
+    def __init__(self, app, output_path="ui_profile.folded", heartbeat_ms=50, stall_threshold_ms=200,
+                 sample_interval_ms=5):
+        self.app = app
+        self.output_path = output_path
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_threshold = stall_threshold_ms / 1000
+        self.sample_interval = sample_interval_ms / 1000
+
+        self.samples = Counter()
+        self.stalls = []
+        self.action_stats = defaultdict(lambda: {"calls": 0, "total": 0.0, "db": 0.0, "model": 0.0, "dialog": 0.0})
+
+        self._actions = []
+        self._actions_since_beat = set()
+        self._phase = None
+        self._last_beat = None
+        self._main_thread_id = None
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self.app.after(self.heartbeat_ms, self._heartbeat)
+        self._sampler = threading.Thread(target=self._sample_loop, name="ui-diagnostics-sampler", daemon=True)
+        self._sampler.start()
+        logging.info(f"UI diagnostics enabled, profile will be written to {self.output_path}")
+
+    def stop(self):
+        self._stopped.set()
+        if self._sampler:
+            self._sampler.join()
+        self.write()
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        lag = now - self._last_beat - self.heartbeat_ms / 1000
+        if lag > self.stall_threshold:
+            actions = sorted(self._actions_since_beat)
+            self.stalls.append((time.time(), lag, actions))
+            logging.warning(f"UI stall {lag * 1000:.0f} ms during {', '.join(actions) or 'idle'}")
+        self._actions_since_beat.clear()
+        self._last_beat = now
+        if not self._stopped.is_set():
+            self.app.after(self.heartbeat_ms, self._heartbeat)
+
+    def _sample_loop(self):
+        while not self._stopped.wait(self.sample_interval):
+            if time.perf_counter() - self._last_beat < self.stall_threshold + self.heartbeat_ms / 1000:
+                continue
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(f"[{self._phase or 'widget'}]")
+            self.samples[";".join(reversed(stack))] += 1
+
+    @contextmanager
+    def action(self, name):
+        """Учитывает время действия, обернутого catch_errors"""
+        self._actions.append(name)
+        self._actions_since_beat.add(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.action_stats[name]
+            stats["calls"] += 1
+            stats["total"] += time.perf_counter() - started
+            self._actions.pop()
+
+    @contextmanager
+    def phase(self, name):
+        """Относит время блока к фазе name всех активных действий; вложенные фазы не учитываются"""
+        if self._phase is not None:
+            yield
+            return
+        self._phase = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            for action in set(self._actions):
+                self.action_stats[action][name] += elapsed
+            self._phase = None
+
+    def wrap_db(self, db_manager):
+        """Возвращает обертку над Database, все вызовы которой относятся к фазе db"""
+        return _TimedDatabase(db_manager, self)
+
+    def summary(self):
+        lines = [f"{'action':<20}{'calls':>7}{'total, ms':>12}{'db, ms':>10}{'model, ms':>11}{'widget, ms':>12}"
+                 f"{'dialog, ms':>12}"]
+        for name, stats in sorted(self.action_stats.items(), key=lambda item: -item[1]["total"]):
+            widget = stats["total"] - stats["db"] - stats["model"] - stats["dialog"]
+            lines.append(
+                f"{name:<20}{stats['calls']:>7}{stats['total'] * 1000:>12.1f}{stats['db'] * 1000:>10.1f}"
+                f"{stats['model'] * 1000:>11.1f}{widget * 1000:>12.1f}{stats['dialog'] * 1000:>12.1f}"
+            )
+        lines.append(f"stalls: {len(self.stalls)}, max {max((s[1] for s in self.stalls), default=0) * 1000:.0f} ms")
+        return "\n".join(lines)
+
+    def write(self):
+        with open(self.output_path, "w") as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+        logging.info(f"UI diagnostics summary:\n{self.summary()}")
+
+
+class _TimedDatabase:
+    def __init__(self, db_manager, diagnostics):
+        self._db_manager = db_manager
+        self._diagnostics = diagnostics
+
+    def __getattr__(self, name):
+        attr = getattr(self._db_manager, name)
+        if not callable(attr):
+            return attr
+
+        @wraps(attr)
+        def timed(*args, **kwargs):
+            with self._diagnostics.phase("db"):
+                return attr(*args, **kwargs)
+
+        return timed
@@ -1,6 +1,9 @@
 import customtkinter as ctk
+from contextlib import nullcontext
 from functools import wraps
 from db.database import TableSchema, TableField, ColumnType
+from db.schema_catalog import SchemaCatalog
+from diagnostics import UIDiagnostics
 
 
 # Декоратор для обработки ошибок
@@ -8,6 +11,10 @@ def catch_errors(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
+            diagnostics = args[0].diagnostics
+            if diagnostics:
+                with diagnostics.action(func.__name__):
+                    return func(*args, **kwargs)
             return func(*args, **kwargs)
         except Exception as e:
             error_message = f"Произошла ошибка: {str(e)}"
@@ -17,10 +24,19 @@ def catch_errors(func):
 
 
 class TableEditorApp(ctk.CTk):
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, diagnostics=False):
         super().__init__()
 
-        self.db_manager = db_manager
+        # Режим диагностики: зависания главного цикла, стеки и фазы действий
+        self.diagnostics = None
+        if diagnostics:
+            self.diagnostics = UIDiagnostics(self)
+            db_manager = self.diagnostics.wrap_db(db_manager)
+            self.diagnostics.start()
+
+        # Столбцы открытых таблиц в компактном виде, без pydantic-моделей
+        # Метаданные таблиц; TableSchema создается только при сохранении изменений
+        self.schema_catalog = SchemaCatalog()
         self.selected_table = None
         self.field_entries = []
 
@@ -75,6 +91,20 @@ class TableEditorApp(ctk.CTk):
         self.error_frame.pack(fill="x", padx=10, pady=5)
         self.error_frame.pack_forget()  
 
+    def diagnostics_action(self, name):
+        """Контекст для учета действия, не обернутого catch_errors, если включена диагностика"""
+        return self.diagnostics.action(name) if self.diagnostics else nullcontext()
+
+    def diagnostics_phase(self, name):
+        """Контекст для учета фазы действия (model/db/dialog), если включена диагностика"""
+        return self.diagnostics.phase(name) if self.diagnostics else nullcontext()
+
+    def get_table_fields(self, table_name):
+        """Столбцы таблицы из каталога; если таблицы там нет, она загружается из базы"""
+        if table_name not in self.schema_catalog:
+            self.schema_catalog.add_table(table_name, self.db_manager.get_table_fields(table_name))
+        return self.schema_catalog.get_table_fields(table_name)
+
     def show_info_message(self, message):
         """Метод для вывода информационного сообщения"""
         self.error_textbox.configure(fg_color="green", text_color="white")
@@ -94,7 +124,11 @@ class TableEditorApp(ctk.CTk):
         for widget in self.tables_frame.winfo_children():
             widget.destroy()
 
-        tables = self.db_manager.get_tables()  
+        tables = self.db_manager.get_tables()
+
+        # Столбцы загружаются в каталог по одной таблице при открытии; удаленные таблицы убираем
+        for table_name in set(self.schema_catalog.get_tables()).difference(tables):
+            self.schema_catalog.remove_table(table_name)
 
         for table_name in tables:
             radio_button = ctk.CTkRadioButton(self.tables_frame, text=table_name, variable=self.table_radio_var,
@@ -108,7 +142,8 @@ class TableEditorApp(ctk.CTk):
     def edit_table(self):
         selected_table = self.table_radio_var.get()
         if selected_table:
-            self.show_table_form(selected_table)
+            with self.diagnostics_action("show_table_form"):
+                self.show_table_form(selected_table)
         else:
             self.show_error_message("Не выбрана таблица для редактирования")
 
@@ -118,7 +153,7 @@ class TableEditorApp(ctk.CTk):
 
         self.field_entries.clear()
 
-        columns = self.db_manager.get_table_fields(table_name)
+        columns = self.get_table_fields(table_name)
 
         for col_name, col_type, is_nullable, is_primary in columns:
             if isinstance(col_type, ColumnType):
@@ -223,11 +258,14 @@ class TableEditorApp(ctk.CTk):
             field_name = field_entry[0].get()
             field_type = ColumnType(field_entry[1].get())
             is_primary = field_entry[2].get()
-            fields[field_name] = TableField(name=field_name, type=field_type, is_primary=is_primary)
+            with self.diagnostics_phase("model"):
+                fields[field_name] = TableField(name=field_name, type=field_type, is_primary=is_primary)
 
         try:
-            schema = TableSchema(name=table_name, fields=fields)
+            with self.diagnostics_phase("model"):
+                schema = TableSchema(name=table_name, fields=fields)
             self.db_manager.create_table_with_fields(schema)
+            self.schema_catalog.remove_table(table_name)
             self.show_info_message(f"Таблица '{table_name}' создана.")
             self.load_tables()
 
@@ -257,6 +295,7 @@ class TableEditorApp(ctk.CTk):
         selected_table = self.table_radio_var.get()
         if selected_table:
             self.db_manager.delete_table(selected_table)
+            self.schema_catalog.remove_table(selected_table)
             self.load_tables()
             self.show_error_message(f"Таблица '{selected_table}' удалена.")
         else:
@@ -267,6 +306,7 @@ class TableEditorApp(ctk.CTk):
         selected_table = self.table_radio_var.get()
         if selected_table:
             self.db_manager.delete_column(selected_table, field_name)
+            self.schema_catalog.remove_table(selected_table)
             self.show_table_form(selected_table)  # Перезагрузка формы для отображения изменений
             self.show_error_message(f"Поле '{field_name}' удалено из таблицы '{selected_table}'.")
         else:
@@ -296,9 +336,13 @@ class TableEditorApp(ctk.CTk):
             self.show_error_message("Таблица не может иметь несколько первичных ключей")
             return
 
+        current_fields = {
+            name: (column_type, is_primary)
+            for name, column_type, _, is_primary in self.get_table_fields(selected_table)
+        }
+
         if primary_key_count == 0:
-            current_fields = self.db_manager.get_table_fields(selected_table)
-            has_existing_primary = any(field[3] for field in current_fields)
+            has_existing_primary = any(is_primary for _, is_primary in current_fields.values())
 
             if not has_existing_primary:
                 response = self.show_yes_no_dialog(
@@ -309,11 +353,10 @@ class TableEditorApp(ctk.CTk):
                     return
 
         try:
-            current_fields = self.db_manager.get_table_fields(selected_table)
-            current_field_names = [field[0] for field in current_fields]
+            current_field_names = list(current_fields)
             new_field_names = [field_entry[0].get() for field_entry in self.field_entries]
 
-            if any(field[3] for field in current_fields):
+            if any(is_primary for _, is_primary in current_fields.values()):
                 self.db_manager.remove_primary_key(selected_table)
 
             for field_name in current_field_names:
@@ -327,7 +370,7 @@ class TableEditorApp(ctk.CTk):
                 if field_name not in current_field_names:
                     self.db_manager.add_column(selected_table, field_name, new_type.value)
                 else:
-                    current_type = next(field[1] for field in current_fields if field[0] == field_name)
+                    current_type = current_fields[field_name][0]
                     if new_type != current_type:
                         try:
                             self.db_manager.alter_column_type_with_using(
@@ -360,10 +403,12 @@ class TableEditorApp(ctk.CTk):
                     )
                     break  
 
+            self.schema_catalog.remove_table(selected_table)
             self.show_info_message(f"Изменения в таблице '{selected_table}' сохранены.")
             self.show_table_form(selected_table)  
 
         except Exception as e:
+            self.schema_catalog.remove_table(selected_table)
             self.db_manager.rollback_transaction()
             self.show_error_message(f"Ошибка при сохранении изменений: {str(e)}")
 
@@ -430,7 +475,8 @@ class TableEditorApp(ctk.CTk):
         no_button.pack(side="right", padx=20, pady=10)
 
         dialog.grab_set()  
-        self.wait_window(dialog)
+        with self.diagnostics_phase("dialog"):
+            self.wait_window(dialog)
 
         return result.get()
 
@@ -447,7 +493,8 @@ class TableEditorApp(ctk.CTk):
         ok_button.pack(pady=10)
 
         dialog.grab_set()
-        self.wait_window(dialog)
+        with self.diagnostics_phase("dialog"):
+            self.wait_window(dialog)
 
     def show_error(self, title, message):
         self.show_info(title, message)
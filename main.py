@@ -1,4 +1,5 @@
 import json
+import os
 from gui.editor import TableEditorApp
 from db.database import Database, DatabaseConfig
 
@@ -12,5 +13,8 @@ def load_db_config(file_path="db_config.json"):
 if __name__ == "__main__":
     DB_CONFIG = load_db_config()
     db_manager = Database(DB_CONFIG)
-    app = TableEditorApp(db_manager)
+    # Диагностика отзывчивости интерфейса: TABLE_EDITOR_DIAGNOSTICS=1 python main.py
+    app = TableEditorApp(db_manager, diagnostics=os.environ.get("TABLE_EDITOR_DIAGNOSTICS") == "1")
     app.mainloop()
+    if app.diagnostics:
+        app.diagnostics.stop()
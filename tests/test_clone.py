@@ -0,0 +1,165 @@
+import threading
+import pytest
+
+pytest.importorskip("pydantic")
+psycopg2 = pytest.importorskip("psycopg2")
+
+from psycopg2 import sql
+from db import clone
+from db.clone import _build_constraints, _copy_from_query, _copy_to_query, _page_ranges
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append(query)
+
+
+def test_empty_table_is_one_open_range():
+    assert _page_ranges(0, 4, 1000) == [(0, None)]
+
+
+def test_small_table_is_not_split():
+    assert _page_ranges(999, 4, 1000) == [(0, None)]
+
+
+def test_streams_limited_by_min_pages_per_stream():
+    assert _page_ranges(2500, 4, 1000) == [(0, 1250), (1250, None)]
+
+
+def test_last_range_is_open_ended():
+    ranges = _page_ranges(100001, 4, 1000)
+
+    assert ranges == [(0, 25000), (25000, 50000), (50000, 75000), (75000, None)]
+
+
+def test_ranges_are_contiguous_without_empty_tail():
+    ranges = _page_ranges(10, 8, 1)
+
+    assert len(ranges) == 8
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert ranges[-1] == (7, None)
+
+
+def test_constraints_keep_primary_key_order_and_quote_names():
+    target = RecordingDatabase()
+    columns = [
+        ("Order Id", "bigint", True, 2),
+        ("tenant", "uuid", True, 1),
+        ("payload", "jsonb", False, None),
+    ]
+
+    _build_constraints(target, "Orders", columns, ["CREATE INDEX orders_payload ON public.\"Orders\" (payload)"])
+
+    table = sql.Identifier("Orders")
+    assert target.queries == [
+        sql.SQL("ALTER TABLE {} {}").format(table, sql.SQL(", ").join([
+            sql.SQL("ALTER COLUMN {} SET NOT NULL").format(sql.Identifier("Order Id")),
+            sql.SQL("ALTER COLUMN {} SET NOT NULL").format(sql.Identifier("tenant")),
+        ])),
+        sql.SQL("ALTER TABLE {} ADD PRIMARY KEY ({})").format(
+            table, sql.SQL(", ").join([sql.Identifier("tenant"), sql.Identifier("Order Id")])
+        ),
+        "CREATE INDEX orders_payload ON public.\"Orders\" (payload)",
+    ]
+
+
+def test_constraints_without_primary_key_or_not_null():
+    target = RecordingDatabase()
+
+    _build_constraints(target, "log", [("message", "text", False, None)], [])
+
+    assert target.queries == []
+
+
+def test_copy_queries_use_the_same_explicit_column_list():
+    columns = sql.SQL(", ").join([sql.Identifier("id"), sql.Identifier("Total Sum")])
+    select = sql.SQL("SELECT {} FROM {}").format(columns, sql.Identifier("Orders"))
+
+    assert _copy_to_query("Orders", ["id", "Total Sum"], 0, None) == \
+        sql.SQL("COPY ({}) TO STDOUT").format(select)
+    assert _copy_from_query("Orders", ["id", "Total Sum"]) == \
+        sql.SQL("COPY {} ({}) FROM STDIN").format(sql.Identifier("Orders"), columns)
+
+
+def test_ranged_copy_filters_by_ctid():
+    select = sql.SQL("SELECT {} FROM {}").format(sql.SQL(", ").join([sql.Identifier("id")]), sql.Identifier("t"))
+    lower = sql.SQL("ctid >= {}::tid").format(sql.Literal("(100,0)"))
+
+    assert _copy_to_query("t", ["id"], 100, 200) == sql.SQL("COPY ({} WHERE {}) TO STDOUT").format(
+        select, sql.SQL("{} AND ctid < {}::tid").format(lower, sql.Literal("(200,0)"))
+    )
+    assert _copy_to_query("t", ["id"], 100, None) == \
+        sql.SQL("COPY ({} WHERE {}) TO STDOUT").format(select, lower)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cancelled = threading.Event()
+
+    def set_session(self, **kwargs):
+        pass
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return ("snapshot-1",)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    config = {}
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.deleted = []
+
+    def get_tables(self):
+        return self.tables
+
+    def delete_table(self, table_name):
+        self.deleted.append(table_name)
+
+
+def test_failed_stream_cancels_the_others(monkeypatch):
+    connections = []
+
+    def connect(**kwargs):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    def pipe_stream(source_connection, snapshot, target_connection, table_name, column_names, page_range, progress):
+        if page_range[0] == 0:
+            raise RuntimeError("stream failed")
+        # Остальные потоки "копируют", пока их не прервут
+        assert target_connection.cancelled.wait(5)
+        raise psycopg2.extensions.QueryCanceledError("canceled")
+
+    monkeypatch.setattr(clone.psycopg2, "connect", connect)
+    monkeypatch.setattr(clone, "_fetch_source_layout", lambda source, name: ([("id", "integer", True, 1)], 4000, []))
+    monkeypatch.setattr(clone, "_create_bare_table", lambda target, name, columns: None)
+    monkeypatch.setattr(clone, "_pipe_stream", pipe_stream)
+    target = FakeDatabase([])
+
+    with pytest.raises(RuntimeError, match="stream failed"):
+        clone.clone_table(FakeDatabase(["orders"]), target, "orders", streams=4)
+
+    assert all(connection.cancelled.is_set() for connection in connections[1:])
+    assert target.deleted == ["orders"]
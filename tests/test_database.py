@@ -0,0 +1,167 @@
+import pytest
+
+pytest.importorskip("pydantic")
+psycopg2 = pytest.importorskip("psycopg2")
+
+import psycopg2.errors
+from psycopg2 import sql
+from db import database
+from db.database import Database, DatabaseConfig
+
+# Время выполнения запросов на фейковых часах: сетевой обмен 10 мс, PREPARE - обмен плюс 5 мс разбора
+COSTS = {"SELECT": 0.010, "PREPARE": 0.015, "EXECUTE": 0.012}
+
+
+def render(query):
+    """Текст запроса без соединения с базой"""
+    if isinstance(query, str):
+        return query
+    if isinstance(query, sql.Composed):
+        return "".join(render(part) for part in query.seq)
+    if isinstance(query, sql.Identifier):
+        return ".".join(f'"{s}"' for s in query.strings)
+    if isinstance(query, sql.Placeholder):
+        return "%s"
+    return query.string
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.closed = False
+
+    def execute(self, query, params=None):
+        text = " ".join(render(query).split())
+        keyword = text.split()[0]
+        self.connection.clock.now += COSTS.get(keyword, 0.0)
+        self.connection.queries.append((keyword, text.split()[1].strip('"') if keyword != "SELECT" else None,
+                                        params))
+        errors = self.connection.errors.get(keyword)
+        if errors:
+            raise errors.pop(0)
+
+    def fetchall(self):
+        return [("users", "integer", "NO", True)]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, clock):
+        self.clock = clock
+        self.queries = []
+        self.errors = {}
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(database.time, "perf_counter", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def db(monkeypatch, clock):
+    monkeypatch.setattr(database.psycopg2, "connect", lambda **kwargs: FakeConnection(clock))
+    return Database(DatabaseConfig(host="localhost", port=5432, dbname="test", user="u", password="p"))
+
+
+def sent(db):
+    return [(keyword, name) for keyword, name, _ in db.connection.queries]
+
+
+def test_statement_is_prepared_once_and_executed_after(db):
+    cursor = db.cursor
+
+    db.get_table_fields("users")
+    db.get_table_fields("orders")
+
+    assert sent(db) == [
+        ("SELECT", None),
+        ("PREPARE", "sa_get_table_fields"),
+        ("EXECUTE", "sa_get_table_fields"),
+        ("EXECUTE", "sa_get_table_fields"),
+    ]
+    assert db.connection.queries[-1][2] == ("orders",)
+    assert db.cursor is cursor
+
+
+def test_parse_time_saved_excludes_round_trip(db):
+    for _ in range(3):
+        db.get_tables()
+
+    stats = db.statement_stats
+    assert stats["prepared"] == 1
+    assert stats["executed"] == 3
+    assert stats["round_trip"] == pytest.approx(0.010)
+    assert stats["prepare_time"] == pytest.approx(0.015)
+    assert stats["parse_time_saved"] == pytest.approx(2 * 0.005)
+
+
+def test_missing_statement_is_prepared_again_once(db):
+    db.get_tables()
+    db.get_table_fields("users")
+    db.connection.errors["EXECUTE"] = [psycopg2.errors.InvalidSqlStatementName()]
+
+    db.get_tables()
+
+    assert sent(db)[-3:] == [
+        ("EXECUTE", "sa_get_tables"),
+        ("PREPARE", "sa_get_tables"),
+        ("EXECUTE", "sa_get_tables"),
+    ]
+    assert "sa_get_table_fields" in db.prepared
+    assert db.connection.rollbacks == 1
+
+
+def test_missing_statement_error_is_raised_after_one_retry(db):
+    db.get_tables()
+    db.connection.errors["EXECUTE"] = [psycopg2.errors.InvalidSqlStatementName() for _ in range(3)]
+
+    with pytest.raises(psycopg2.errors.InvalidSqlStatementName):
+        db.get_tables()
+
+    assert [keyword for keyword, _ in sent(db)].count("EXECUTE") == 3
+    assert len(db.connection.errors["EXECUTE"]) == 1
+
+
+def test_duplicate_prepare_reuses_server_statement(db):
+    db.connection.errors["PREPARE"] = [psycopg2.errors.DuplicatePreparedStatement()]
+
+    assert db.get_tables() == ["users"]
+
+    assert sent(db) == [("SELECT", None), ("PREPARE", "sa_get_tables"), ("EXECUTE", "sa_get_tables")]
+    assert db.prepared["sa_get_tables"] == 0.0
+    assert db.statement_stats["prepared"] == 0
+
+
+def test_connect_resets_prepared_statements(db):
+    db.get_tables()
+
+    db.connect()
+    db.get_tables()
+
+    assert sent(db) == [("SELECT", None), ("PREPARE", "sa_get_tables"), ("EXECUTE", "sa_get_tables")]
+    assert db.round_trip is not None
@@ -0,0 +1,144 @@
+import time
+import pytest
+import diagnostics
+from diagnostics import UIDiagnostics
+
+
+class FakeApp:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(diagnostics.time, "perf_counter", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def ui(tmp_path):
+    return UIDiagnostics(FakeApp(), output_path=str(tmp_path / "profile.folded"))
+
+
+def test_phases_are_split_out_of_widget_time(ui, clock):
+    with ui.action("save_changes"):
+        with ui.phase("db"):
+            clock.advance(0.05)
+        with ui.phase("model"):
+            clock.advance(0.01)
+        with ui.phase("dialog"):
+            clock.advance(3.0)
+        clock.advance(0.02)
+
+    stats = ui.action_stats["save_changes"]
+    assert stats["calls"] == 1
+    assert stats["total"] == pytest.approx(3.08)
+    assert stats["db"] == pytest.approx(0.05)
+    assert stats["model"] == pytest.approx(0.01)
+    assert stats["dialog"] == pytest.approx(3.0)
+    row = ui.summary().splitlines()[1].split()
+    assert row[0] == "save_changes"
+    assert float(row[5]) == pytest.approx(20.0)
+
+
+def test_nested_actions_share_phase_time(ui, clock):
+    with ui.action("save_new_table"):
+        clock.advance(0.01)
+        with ui.action("load_tables"):
+            with ui.phase("db"):
+                clock.advance(0.1)
+
+    assert ui.action_stats["save_new_table"]["total"] == pytest.approx(0.11)
+    assert ui.action_stats["save_new_table"]["db"] == pytest.approx(0.1)
+    assert ui.action_stats["load_tables"]["total"] == pytest.approx(0.1)
+    assert ui.action_stats["load_tables"]["db"] == pytest.approx(0.1)
+
+
+def test_nested_phase_is_counted_once(ui, clock):
+    with ui.action("save_new_table"):
+        with ui.phase("model"):
+            clock.advance(0.01)
+            with ui.phase("db"):
+                clock.advance(0.2)
+
+    stats = ui.action_stats["save_new_table"]
+    assert stats["model"] == pytest.approx(0.21)
+    assert stats["db"] == 0.0
+
+
+def test_wrapped_db_calls_are_db_phase(ui, clock):
+    class Database:
+        timeout = 5
+
+        def get_tables(self):
+            clock.advance(0.3)
+            return ["users"]
+
+    db = ui.wrap_db(Database())
+    with ui.action("load_tables"):
+        assert db.get_tables() == ["users"]
+
+    assert db.timeout == 5
+    assert ui.action_stats["load_tables"]["db"] == pytest.approx(0.3)
+
+
+def test_heartbeat_records_stall_with_actions(ui, clock):
+    ui.start()
+    ui.stop()
+    with ui.action("show_table_form"):
+        clock.advance(0.5)
+    ui.app.scheduled.clear()
+
+    ui._heartbeat()
+
+    assert len(ui.stalls) == 1
+    _, lag, actions = ui.stalls[0]
+    assert lag == pytest.approx(0.45)
+    assert actions == ["show_table_form"]
+
+
+def test_heartbeat_below_threshold_is_not_a_stall(ui, clock):
+    ui._last_beat = clock.now
+    clock.advance(0.1)
+
+    ui._heartbeat()
+
+    assert ui.stalls == []
+    assert ui.app.scheduled == [(ui.heartbeat_ms, ui._heartbeat)]
+
+
+def test_stalled_stacks_are_written_in_folded_format(ui):
+    def slow_query():
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            pass
+
+    ui.start()
+    ui._last_beat = time.perf_counter() - 10
+    with ui.action("load_tables"), ui.phase("db"):
+        slow_query()
+    ui.stop()
+
+    with open(ui.output_path) as file:
+        lines = file.read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    frames = stack.split(";")
+    assert frames[0] == "[db]"
+    assert any(frame.startswith("slow_query (test_diagnostics.py:") for frame in frames)
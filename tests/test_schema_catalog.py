@@ -0,0 +1,101 @@
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("psycopg2")
+
+from db.database import ColumnType
+from db.schema_catalog import SchemaCatalog
+
+
+def make_catalog():
+    catalog = SchemaCatalog()
+    catalog.extend([
+        ("orders", "id", "integer", False, True),
+        ("orders", "comment", "text", True, False),
+        ("users", "id", "integer", False, True),
+        ("users", "score", "double precision", True, False),
+        ("users", "email", "character varying", False, False),
+    ])
+    return catalog
+
+
+def test_extend_groups_rows_by_table():
+    catalog = make_catalog()
+
+    assert len(catalog) == 2
+    assert catalog.column_count == 5
+    assert catalog.get_tables() == ["orders", "users"]
+    assert catalog.get_table_fields("orders") == [
+        ("id", ColumnType.INTEGER, False, True),
+        ("comment", ColumnType.TEXT, True, False),
+    ]
+    assert catalog.get_table_fields("users") == [
+        ("id", ColumnType.INTEGER, False, True),
+        ("score", ColumnType.FLOAT, True, False),
+        ("email", ColumnType.CHARACTER_VARYING, False, False),
+    ]
+
+
+def test_flags_are_packed_independently():
+    catalog = SchemaCatalog()
+    catalog.extend([
+        ("t", "a", "integer", False, False),
+        ("t", "b", "integer", True, False),
+        ("t", "c", "integer", False, True),
+        ("t", "d", "integer", True, True),
+    ])
+
+    assert [(nullable, primary) for _, _, nullable, primary in catalog.get_table_fields("t")] == [
+        (False, False), (True, False), (False, True), (True, True),
+    ]
+
+
+def test_names_are_interned_once():
+    catalog = make_catalog()
+
+    orders_id = catalog.get_table_fields("orders")[0][0]
+    users_id = catalog.get_table_fields("users")[0][0]
+    assert orders_id is users_id
+
+
+def test_duplicate_table_is_rejected():
+    catalog = make_catalog()
+
+    with pytest.raises(ValueError):
+        catalog.extend([("orders", "extra", "text", True, False)])
+    with pytest.raises(ValueError):
+        catalog.add_table("users", [("id", ColumnType.INTEGER, False, True)])
+
+
+def test_add_table_accepts_get_table_fields_format():
+    catalog = SchemaCatalog()
+    columns = [("id", ColumnType.INTEGER, False, True), ("created", "date", True, False)]
+    catalog.add_table("events", columns)
+
+    assert catalog.get_table_fields("events") == [
+        ("id", ColumnType.INTEGER, False, True),
+        ("created", ColumnType.DATE, True, False),
+    ]
+
+
+def test_remove_table_allows_reload():
+    catalog = make_catalog()
+    catalog.remove_table("orders")
+
+    assert "orders" not in catalog
+    with pytest.raises(KeyError):
+        catalog.get_table_fields("orders")
+
+    catalog.add_table("orders", [("id", ColumnType.INTEGER, False, True)])
+    assert catalog.get_table_fields("orders") == [("id", ColumnType.INTEGER, False, True)]
+    assert catalog.get_table_fields("users")[1] == ("score", ColumnType.FLOAT, True, False)
+
+
+def test_to_table_schema_builds_validated_models():
+    schema = make_catalog().to_table_schema("users")
+
+    assert schema.name == "users"
+    assert list(schema.fields) == ["id", "score", "email"]
+    assert schema.fields["id"].is_primary
+    assert not schema.fields["email"].is_nullable
+    assert schema.fields["score"].type == ColumnType.FLOAT